@@ -1,3 +1,3 @@
 from .containers import *
 from .grouping import Groups
-from .type_check import OfType
\ No newline at end of file
+from .type_check import OfType, ListOf
\ No newline at end of file
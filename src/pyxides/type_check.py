@@ -5,14 +5,34 @@ Enable construction of containers with uniform item type(s)
 # std libs
 import warnings as wrn
 from abc import ABCMeta
-from collections import abc
+from itertools import repeat
+from collections import UserList, abc
 
 
 # local libs
-from recipes.iter import first_true_index
 from recipes.functionals import echo0, raises as bork
 
 
+# Bases whose presence in the mro marks a class as a container in
+# `OfTypes.make_bases` without an `issubclass` check. The builtins are only
+# virtual subclasses of `abc.Container`, so they are not in the mro of their
+# subclasses
+_CONTAINER_TYPES = frozenset((abc.Container, list, tuple, dict, set, frozenset))
+
+
+def _fmt_incompat(requested, allowed, name):
+    # error message for incompatible type restrictions in `OfTypes.make_bases`.
+    # Only formatted when the error is actually raised
+    return (f'Multiple type restrictions ({requested}, {allowed}) requested in '
+            f'different bases of container class {name}.')
+
+
+def _enforces_types(func):
+    # mark `append` implementations that check the item type and then store it
+    func._enforces_types = True
+    return func
+
+
 class OfTypes(ABCMeta):
     """
     Factory that creates TypeEnforcer classes. Allows for the following usage
@@ -35,8 +55,23 @@ class OfTypes(ABCMeta):
             # This results from an internal call during class construction
             name, bases, attrs = args
             # create class
-            return super().__new__(cls, name, cls.make_bases(name, bases),
-                                   attrs, **kws)
+            kls = super().__new__(cls, name, cls.make_bases(name, bases),
+                                  attrs, **kws)
+
+            # pre-format the invariant part of the type error message
+            allowed = kls._allowed_types
+            many = len(allowed) > 1
+            ok = allowed if many else allowed[0]
+            kls._type_error_prefix = (
+                f'Items in container class {name!r} must derive from '
+                f'{"one of " if many else ""}{ok}. '
+            )
+
+            # specialized `append` with the allowed types bound as a constant
+            append = cls._specialize_append(kls)
+            if append:
+                kls.append = append
+            return kls
 
         # we are here if invoked by direct call:
         # >>> cls = OfTypes(int)
@@ -44,6 +79,8 @@ class OfTypes(ABCMeta):
         # create TypeEnforcer class that inherits from _TypeEnforcer.
         # args gives allowed types for this container.
         # `_allowed_types` class attribute set to tuple of allowed types
+        # `_allowed_types_exact` is the frozenset of these for fast identity
+        # checks on the item type
 
         # check arguments are given and class objects
         if len(args) == 0:
@@ -54,8 +91,55 @@ class OfTypes(ABCMeta):
                 raise TypeError(f'Arguments to {cls.__name__!r} constructor '
                                 'should be classes')
 
-        return super().__new__(cls, 'TypeEnforcer', (_TypeEnforcer,),
-                               {'_allowed_types': tuple(args)}, **kws)
+        return super().__new__(cls, 'TypeEnforcer', cls._enforcer_bases(),
+                               {'_allowed_types': tuple(args),
+                                '_allowed_types_exact': frozenset(args)},
+                               **kws)
+
+    def __init__(cls, *args, **kws):
+        # `type.__init__` only accepts the `(name, bases, attrs)` signature, so
+        # skip it for direct calls like `OfTypes(int, float)`
+        if isinstance(args[0], str):
+            super().__init__(*args, **kws)
+
+    @classmethod
+    def _enforcer_bases(cls):
+        # bases for TypeEnforcer classes created by direct call
+        return (_TypeEnforcer, )
+
+    @staticmethod
+    def _specialize_append(kls):
+        # Generate an `append` for container class `kls` that has its allowed
+        # types bound in a closure, instead of looked up on the instance. This
+        # is only done if the `append` resolved for `kls` is a type checking
+        # one: the specialized method then calls the container's `append`
+        # directly, skipping the chain of type checking implementations. User
+        # defined `append` methods are left alone.
+        appends = (base.__dict__['append'] for base in kls.__mro__
+                   if 'append' in base.__dict__)
+        container_append = next(appends, None)
+        if not getattr(container_append, '_enforces_types', False):
+            return None
+
+        while getattr(container_append, '_enforces_types', False):
+            container_append = next(appends, None)
+
+        if container_append is None:
+            # no container class in the bases
+            return None
+
+        allowed = kls._allowed_types
+
+        @_enforces_types
+        def append(self, item):
+            # emit only looked up for bad items, skipping `check_type` when
+            # type checking is disabled
+            if (not isinstance(item, allowed)
+                    and self.emit is not self._emit_silent):
+                self.check_type(item, len(self))
+            container_append(self, item)
+
+        return append
 
     @classmethod
     def make_bases(cls, name, bases):
@@ -72,86 +156,56 @@ class OfTypes(ABCMeta):
         # TypeEnforcer this is allowed, else raise TypeError since it will lead
         # to type enforcement being done for different types at different levels
         # in the class heirarchy
-        ite = None
-        ic = None
+        idx_enf = idx_cnt = None
+        requested_allowed_types = ()
         currently_allowed_types = []
-        # enforcers = []
-        # base_enforcers = []
-        # indices = []
-        # new_bases = list(bases)
-
         for i, base in enumerate(bases):
-            # print('BASS', base)
-            if issubclass(base, abc.Container):
-                ic = i
+            # Identity tests on the mro identify (real) container bases without
+            # `ABCMeta.__subclasscheck__`. All other bases, including the
+            # TypeEnforcer ones, still fall back to `issubclass` to catch
+            # virtual subclasses of `abc.Container` (deque, ndarray, classes
+            # defining `__contains__`). This only runs at class creation.
+            mro = base.__mro__
+            if (not _CONTAINER_TYPES.isdisjoint(mro)
+                    or issubclass(base, abc.Container)):
+                idx_cnt = i
 
             # base is a TypeEnforcer class
-            if issubclass(base, _TypeEnforcer):
-                # _TypeEnforcer !
-                # print('_TypeEnforcer !', base,  base._allowed_types)
+            if _TypeEnforcer in mro:
                 requested_allowed_types = base._allowed_types
-                ite = i
-
-            # look for other `_TypeEnforcer`s in the inheritance diagram so we
-            # consolidate the type checking
-            for bb in base.__bases__:
-                if isinstance(bb, cls):
-                    # this is a `_TypeEnforcer` base
-                    currently_allowed_types.extend(bb._allowed_types)
-                    # print(currently_allowed_types)
-                    # base_enforcers.append(bb)
-                    # original_base = base
-
-        # print('=' * 80)
-        # print(name, bases)
-        # print('requested', requested_allowed_types)
-        # print('current', currently_allowed_types)
-
-        # deal with multiple enforcers
-        # en0, *enforcers = enforcers
-        # ite, *indices = indices
-        # if len(enforcers) > 0:
-        #     # multiple enforcers defined like this:
-        #     # >>> class Foo(list, OfType(int), OfType(float))
-        #     # instead of like this:
-        #     # >>> class Foo(list, OfType(int, float))
-        #     # merge type checking
-        #     warnings.warn(f'Multiple `TypeEnforcer`s in bases of {name}. '
-        #                   'Please use `OfType(clsA, clsB)` to allow multiple '
-        #                   'types in your containers')
-
-        #     for i, ix in enumerate(indices):
-        #         new_bases.pop(ix - i)
+                idx_enf = i
 
-        # consolidate allowed types
-        if currently_allowed_types:
-            # new_allowed_types = []
-            # loop through currently allowed types
-            for allowed in currently_allowed_types:
-                for new in requested_allowed_types:
-                    if issubclass(new, allowed):
-                        # type restriction requested is a subclass of already
-                        # existing restriction type.  This means we narrow the
-                        # restriction to the new (subclass) type
-                        # new_allowed_types.append(new)
-                        break
-
-                    # requested type restriction is a new type unrelated to
-                    # existing restriction. Disallow
-                    raise TypeError(
-                        f'Multiple type restrictions ({new}, {allowed}) '
-                        'requested in different bases of container class '
-                        f'{name}.')  # To allow multiple
-
-        if (ite is None) or (ic is None):
+                # look for other `_TypeEnforcer`s in the inheritance diagram so
+                # we consolidate the type checking. Only bases that are
+                # themselves enforcers can have these.
+                for bb in base.__bases__:
+                    if isinstance(bb, OfTypes):
+                        currently_allowed_types.extend(bb._allowed_types)
+
+        if idx_enf is None:
             return bases
 
-        if ic < ite:
+        # consolidate allowed types
+        if currently_allowed_types:
+            for new in requested_allowed_types:
+                # type restriction requested is a subclass of an already
+                # existing restriction type.  This means we narrow the
+                # restriction to the new (subclass) type
+                if any(issubclass(new, allowed)
+                       for allowed in currently_allowed_types):
+                    continue
+
+                # requested type restriction is a new type unrelated to
+                # existing restrictions. Disallow, since this would widen the
+                # restriction
+                raise TypeError(
+                    _fmt_incompat(new, tuple(currently_allowed_types), name))
+
+        if (idx_cnt is not None) and (idx_cnt < idx_enf):
             # _TypeEnforcer is before UserList in inheritance order so that
             # types get checked before initialization of the `Container`
             _bases = list(bases)
-            _bases.insert(ic, _bases.pop(ite))
-            # print('new_bases', _bases)
+            _bases.insert(idx_cnt, _bases.pop(idx_enf))
             return tuple(_bases)
 
         return bases
@@ -161,6 +215,28 @@ class OfTypes(ABCMeta):
 OfType = OfTypes
 
 
+class ListOf(OfTypes):
+    """
+    Factory that creates type enforcing `list` containers:
+
+    >>> class Integers(ListOf(int)):
+    ...     pass
+
+    The resulting containers subclass the builtin `list` directly, so items
+    are stored (and accessed) without the indirection through the `data`
+    attribute of `UserList`. Set `ListOf._use_userlist = True` for
+    `UserList`-based containers instead.
+    """
+
+    _use_userlist = False
+
+    @classmethod
+    def _enforcer_bases(cls):
+        if cls._use_userlist:
+            return (_TypeEnforcer, UserList)
+        return (_ListTypeEnforcer, )
+
+
 class _TypeEnforcer: 
     """
     Item type checking mixin for list-like containers
@@ -178,50 +254,138 @@ class _TypeEnforcer:
     # Box()
 
     _allowed_types = (object, )     # placeholder
-    _actions = {-1: echo0,          # silently ignore
-                0: wrn.warn,
-                1: bork(TypeError)}
-    emit = staticmethod(_actions[1])              # default
+    _allowed_types_exact = frozenset(_allowed_types)
+    _type_error_prefix = ''         # placeholder
+    _emit_raise = staticmethod(bork(TypeError))
+    _emit_warn = staticmethod(wrn.warn)
+    _emit_silent = staticmethod(echo0)      # silently ignore
+    emit = _emit_raise                      # default
 
     @classmethod
     def type_checking(cls, severity=1):
-        cls.emit = staticmethod(cls._actions[int(severity)])
+        severity = int(severity)
+        if severity not in (-1, 0, 1):
+            raise ValueError(f'Invalid type checking severity {severity}. '
+                             'Use -1 (silent), 0 (warn) or 1 (raise).')
+
+        cls.emit = staticmethod(
+            (cls._emit_silent, cls._emit_warn, cls._emit_raise)[severity + 1]
+        )
 
     def __init__(self, items=()):
-        super().__init__(self.checks_type(items))
-        # self.emit = self._actions[int(severity)]
+        super().__init__(self._checked(items))
+
+    def _checked(self, itr):
+        if self.emit is self._emit_silent:
+            # type checking disabled
+            return itr
+
+        if self.emit is self._emit_raise:
+            return self._validate_bulk(itr)
+        return self.checks_type(itr)
+
+    def _validate_bulk(self, itr):
+        """
+        Check all items in a single pass (the loop runs in C via `all` and
+        `map`), falling back to per-item diagnostics only on failure.
+        """
+        items = list(itr)
+        # exact type identity test, the equivalent of `Py_TYPE(obj) == kls`
+        # over all items, with the loop in C
+        if self._allowed_types_exact.issuperset(map(type, items)):
+            return items
+
+        if all(map(isinstance, items, repeat(self._allowed_types))):
+            return items
+
+        for i, obj in enumerate(items):
+            self.check_type(obj, i)
+        return items
 
     def checks_type(self, itr, raises=None, warns=None, silent=None):
         """Generator that checks types"""
-        if raises is warns is silent is None:
-            # default behaviour decided at init (default is to raise TypeError)
-            raises = True
+        emit = self._pick_emit(raises, warns, silent)
+        if emit is self._emit_silent:
+            # type checking disabled, nothing to do per item
+            yield from itr
+            return
 
-        emit = self._actions[1 - first_true_index((raises, warns, silent))]
-        for i, obj in enumerate(itr):
+        # local bindings for the fast path where items pass the check
+        allowed = self._allowed_types
+        _isinstance = isinstance
+        if emit is self._emit_warn:
+            # only the warning path needs the warnings filter.  The item index
+            # is not needed here either. Leaving it out of the message also
+            # lets the 'once' filter issue a single warning per offending type
             with wrn.catch_warnings():
                 wrn.filterwarnings('once', 'Items in container class')
-                self.check_type(obj, i, emit)
+                for obj in itr:
+                    if not _isinstance(obj, allowed):
+                        self.check_type(obj, emit=emit)
+                    yield obj
+            return
+
+        for i, obj in enumerate(itr):
+            if _isinstance(obj, allowed):
                 yield obj
+                continue
+
+            self.check_type(obj, i, emit)
+            yield obj
+
+    def _pick_emit(self, raises=None, warns=None, silent=None):
+        # default behaviour decided by `type_checking` (default is to raise
+        # TypeError)
+        return (self._emit_raise if raises else
+                self._emit_warn if warns else
+                self._emit_silent if silent else
+                self.emit)
 
     def check_type(self, obj, i='', emit=None):
         """Type checker"""
+        # exact type match is the common case for homogeneous containers, and
+        # avoids the mro walk in `isinstance`
+        kls = type(obj)
+        exact = self._allowed_types_exact
+        if kls in exact:
+            return
+
+        # subclasses: a single walk of the item's mro with set lookups instead
+        # of one `issubclass` mro walk per allowed type
+        if not exact.isdisjoint(kls.__mro__):
+            return
+
+        # virtual subclasses (registered with an ABC) are not in the mro
         if isinstance(obj, self._allowed_types):
             return
 
         emit = emit or self.emit
-        if emit is echo0:
+        if emit is self._emit_silent:
             return
 
-        many = len(self._allowed_types) > 1
-        ok = self._allowed_types[... if many else 0]
-        emit(f'Items in container class {self.__class__.__name__!r} must '
-             f'derive from {"one of" if many else ""} {ok}. '
-             f'Item {i}{" " * bool(i)} is of type {type(obj)!r}.')
+        emit(f'{self._type_error_prefix}'
+             f'Item {i}{" " * (i != "")}is of type {kls!r}.')
 
+    @_enforces_types
     def append(self, item):
-        self.check_type(item, len(self))
+        if self.emit is not self._emit_silent:
+            self.check_type(item, len(self))
         super().append(item)
 
     def extend(self, itr):
-        super().extend(self.checks_type(itr))
+        super().extend(self._checked(itr))
+
+
+class _ListTypeEnforcer(_TypeEnforcer, list):
+    """
+    Item type checking for containers that subclass the builtin `list`
+    """
+
+    @_enforces_types
+    def append(self, item):
+        if self.emit is not self._emit_silent:
+            self.check_type(item, len(self))
+        list.append(self, item)
+
+    def extend(self, itr):
+        list.extend(self, self._checked(itr))
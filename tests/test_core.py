@@ -1,14 +1,16 @@
 
 # std libs
 import numbers
-from collections import UserList
+import warnings as wrn
+from abc import ABC
+from collections import UserList, abc, deque
 
 # third-party libs
 import pytest
 import numpy as np
 
 #
-from pyxides.type_check import OfTypes, _TypeEnforcer
+from pyxides.type_check import OfTypes, ListOf, _TypeEnforcer
 
 
 # pylint: disable=C0111     # Missing %s docstring
@@ -30,6 +32,18 @@ class CoI(UserList, OfTypes(numbers.Integral)):
 class CoR(UserList, OfTypes(numbers.Real)):
     pass
 
+
+class CoIF(UserList, OfTypes(int, float)):
+    pass
+
+
+class CoH(UserList, OfTypes(abc.Hashable)):
+    pass
+
+
+class LoI(ListOf(int)):
+    pass
+
 # ---------------------------------------------------------------------------- #
 class TestOfTypes:
     def test_empty_init(self):
@@ -39,31 +53,165 @@ class TestOfTypes:
     @pytest.mark.parametrize(
         'base, allowed',
         (  # This should be OK since numbers.Real derives from numbers.Integral
-            (CoR, numbers.Integral),
+            (CoR, (numbers.Integral, )),
             # This should also be OK since bool derives from int
-            (Coi, bool)
+            (Coi, (bool, )),
+            # Each of the requested types narrows one of the previously
+            # allowed types
+            (CoIF, (bool, float)),
+            (CoIF, (bool, ))
         )
     )
     def test_multiple_inheritance(self, base, allowed):
-        class CoX(base, OfTypes(allowed)):
+        class CoX(base, OfTypes(*allowed)):
             pass
 
         # make sure the TypeEnforcer is higher in the mro
         assert issubclass(CoX.__bases__[0], _TypeEnforcer)
         # make sure the `_allowed_types` got updated
-        assert CoX._allowed_types == (allowed, )
+        assert CoX._allowed_types == allowed
+
+    def test_multiple_inheritance_registered(self):
+        # type restrictions are consolidated with the current ABC registry
+        class Num(ABC):
+            pass
+
+        class MyNum:
+            pass
+
+        class CoN(UserList, OfTypes(Num)):
+            pass
 
-    def test_multiple_inheritance_fails(self):
         with pytest.raises(TypeError):
-            # multiple unrelated type estrictions requested in different
+            class CoM(CoN, OfTypes(MyNum)):
+                pass
+
+        Num.register(MyNum)
+
+        class CoNarrow(CoN, OfTypes(MyNum)):
+            pass
+
+        assert CoNarrow._allowed_types == (MyNum, )
+
+    def test_virtual_container(self):
+        # `deque` is only a virtual subclass of `abc.Container`
+        class DoI(deque, OfTypes(int)):
+            pass
+
+        assert issubclass(DoI.__bases__[0], _TypeEnforcer)
+
+        cx = DoI([1, 2])
+        with pytest.raises(TypeError):
+            cx.append('y')
+
+        with pytest.raises(TypeError):
+            DoI([1.5, 'x'])
+
+    def test_list_of(self):
+        # containers from `ListOf` are lists, not wrappers around one
+        assert issubclass(LoI, list)
+        assert not issubclass(LoI, UserList)
+        assert LoI([1, 2]) + [3] == [1, 2, 3]
+
+    def test_list_of_userlist(self, monkeypatch):
+        monkeypatch.setattr(ListOf, '_use_userlist', True)
+
+        class UoI(ListOf(int)):
+            pass
+
+        cx = UoI([1, 2])
+        assert isinstance(cx, UserList)
+        assert cx.data == [1, 2]
+
+        with pytest.raises(TypeError):
+            cx.append(1.)
+
+        with pytest.raises(TypeError):
+            UoI([1.])
+
+    def test_append_specialized(self, monkeypatch):
+        class Store(UserList):
+            def append(self, item):
+                self.stored = item
+                super().append(item)
+
+        class SoI(Store, OfTypes(int)):
+            pass
+
+        # specialized `append` installed, and calls the container's `append`
+        assert 'append' in SoI.__dict__
+        cx = SoI()
+        cx.append(1)
+        assert cx.stored == 1
+        assert cx == [1]
+
+        with pytest.raises(TypeError):
+            cx.append('1')
+        assert cx.stored == 1
+
+        # no `check_type` call when type checking is disabled
+        def check_type(*args):
+            raise AssertionError('check_type called')
+
+        monkeypatch.setattr(SoI, 'check_type', check_type)
+        SoI.type_checking(-1)
+        try:
+            cx.append('1')
+        finally:
+            # restore default emit
+            del SoI.emit
+        assert cx == [1, '1']
+
+    def test_append_override(self):
+        # user defined `append` of a base container is still called when a
+        # subclass narrows the type restriction
+        class Logged(ListOf(numbers.Real)):
+            def append(self, item):
+                self.appended = item
+                super().append(item)
+
+        class LoggedInts(Logged, OfTypes(int)):
+            pass
+
+        ints = LoggedInts()
+        ints.append(1)
+        assert ints.appended == 1
+        with pytest.raises(TypeError):
+            ints.append(1.)
+
+    @pytest.mark.parametrize(
+        'base, allowed',
+        (  # multiple unrelated type restrictions requested in different
             # bases of container
-            class CoF(CoI, OfTypes(float)):
+            (CoI, (float, )),
+            # widening the restriction is not allowed either
+            (Coi, (bool, str))
+        )
+    )
+    def test_multiple_inheritance_fails(self, base, allowed):
+        with pytest.raises(TypeError):
+            class CoF(base, OfTypes(*allowed)):
                 pass
 
+    @pytest.mark.parametrize(
+        'Container, item',
+        [  # exact type
+            (CoIF, 1.),
+            # subclass, found in the item's mro
+            (CoIF, True),
+            # virtual subclass, registered with `numbers.Integral`
+            (CoI, np.int64(1))]
+    )
+    def test_check_type(self, Container, item):
+        Container().check_type(item)
+
     @pytest.mark.parametrize(
         'Container, ok, bad',
         [(CoI, [1, 2, 3], [1.]),
-         (CoR, [1, np.float(1.)], [1j])]
+         (CoR, [1, np.float(1.)], [1j]),
+         (CoIF, [1, 1.], ['1']),
+         (CoH, [1, 'a'], [[]]),
+         (LoI, [1, 2, 3], [1.])]
     )
     def test_type_checking(self, Container, ok, bad):
         #
@@ -75,5 +223,68 @@ class TestOfTypes:
         with pytest.raises(TypeError):
             cx.extend(bad)
 
+        # failed extend leaves the container unchanged
+        with pytest.raises(TypeError):
+            cx.extend(ok + bad)
+        assert cx == ok
+
         with pytest.raises(TypeError):
             Container(bad)
+
+    @pytest.mark.parametrize('Container', (CoI, LoI))
+    def test_type_checking_warn(self, Container):
+        Container.type_checking(0)
+        try:
+            # bad items are kept, with a warning for each operation
+            with pytest.warns(UserWarning):
+                cx = Container([1, 1.])
+            with pytest.warns(UserWarning):
+                cx.extend(['1'])
+            with pytest.warns(UserWarning):
+                cx.append(1j)
+            assert cx == [1, 1., '1', 1j]
+        finally:
+            # restore default emit
+            del Container.emit
+
+    def test_type_checking_invalid_severity(self):
+        with pytest.raises(ValueError):
+            CoI.type_checking(2)
+        # emit not modified
+        assert 'emit' not in CoI.__dict__
+
+    def test_type_checking_warn_once(self):
+        # NOTE: the 'once' filter is process-wide, so use a container and item
+        # type that no other test warns about
+        class Once(UserList, OfTypes(int)):
+            pass
+
+        cx = Once([1])
+        with wrn.catch_warnings(record=True) as caught:
+            wrn.simplefilter('always')
+            items = list(cx.checks_type([1, b'a', 2, b'b', b'c'], warns=True))
+
+        assert items == [1, b'a', 2, b'b', b'c']
+        # the item index is not reported, so repeated bad items of the same
+        # type emit a single warning
+        assert [str(w.message) for w in caught] == [
+            "Items in container class 'Once' must derive from <class 'int'>. "
+            "Item is of type <class 'bytes'>."
+        ]
+
+    @pytest.mark.parametrize('Container', (CoI, LoI))
+    def test_type_checking_silent(self, Container):
+        Container.type_checking(-1)
+        try:
+            with wrn.catch_warnings():
+                wrn.simplefilter('error')
+                cx = Container([1, 1.])
+                cx.extend(['1'])
+                cx.append(1j)
+            assert cx == [1, 1., '1', 1j]
+        finally:
+            # restore default emit
+            del Container.emit
+
+        with pytest.raises(TypeError):
+            Container([1.])